@@ -3,11 +3,13 @@ import itertools
 import pathlib
 import re
 import subprocess
-from codecs import getwriter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
-from io import BytesIO
+from functools import cache, lru_cache
+from hashlib import blake2b
+from io import BytesIO, StringIO
 from os import PathLike
-from shutil import copyfileobj, move
+from shutil import copyfile, move
 from tempfile import TemporaryDirectory
 from typing import IO, Any, Literal, Optional, Self, Type
 
@@ -24,7 +26,7 @@ from matplotlib.path import Path
 from matplotlib.text import Text
 from matplotlib.transforms import Affine2DBase, Transform
 from numpy.typing import ArrayLike
-from PIL import Image, ImageOps
+from PIL import Image
 
 # Module `matplotlib.typing` has been introduced in matplotlib@3.8 but the
 # latest Ubuntu LTS 24.04 provides matplotlib@3.6. Since we are not ready to
@@ -38,9 +40,10 @@ else:
     ColorType = Any
 
 import mpl_typst.config as C
-from mpl_typst.config import Config, TypstVersion, compiler
+from mpl_typst.config import Config, TypstVersion
 from mpl_typst.typst import (
-    Array, Block, Call, Content, Dictionary, Scalar, Writer as TypstWriter)
+    Block, Call, Raw, Scalar,
+    Writer as TypstWriter)
 
 __all__ = ('FigureCanvas', 'FigureManager', 'TypstFigureCanvas',
            'TypstFigureManager', 'TypstGraphicsContext', 'TypstRenderer',
@@ -48,12 +51,127 @@ __all__ = ('FigureCanvas', 'FigureManager', 'TypstFigureCanvas',
 
 PROLOGUE = pathlib.Path(__file__).parent / 'prologue.typ'
 
+# Interned zero literal: almost every emitted `place` carries it, and
+# `Scalar` is frozen, so a single instance serves them all.
+ZERO_IN = Scalar(0, 'in')
+CURVE_CLOSE = Raw('curve.close(mode: "straight")')
+
+# Translation table for escaping metadata values embedded in Typst string
+# literals.
+ESCAPE_STRING = str.maketrans({'\\': '\\\\', '"': '\\"'})
+
+
+@cache
+def _read_prologue() -> tuple[str, str, str, str]:
+    """Read the prologue template once per process and pre-split it around
+    its placeholders: every savefig (and every format of a multi-format save)
+    needs it, and substitution becomes a single join instead of three passes
+    over the template.
+    """
+    head, _, rest = PROLOGUE.read_text().partition('{{ date }}')
+    mid1, _, rest = rest.partition('{{ imports }}')
+    mid2, _, tail = rest.partition('{{ preamble }}')
+    return head, mid1, mid2, tail
+
+
+# Bound on the number of artifacts kept in the compile cache (see
+# `_compile_cache_get`/`_compile_cache_put`).
+COMPILE_CACHE_LIMIT = 64
+
+# Target directories already ensured to exist: batch renders into the same
+# directory skip the mkdir stat per figure.
+_KNOWN_DIRS: set[pathlib.Path] = set()
+
+
+def _ensure_dir(path: pathlib.Path):
+    if path not in _KNOWN_DIRS:
+        path.mkdir(exist_ok=True, parents=True)
+        _KNOWN_DIRS.add(path)
+
+
+def _compile_cache_dir() -> pathlib.Path:
+    cache_dir = pathlib.Path(get_cachedir()) / 'mpl_typst' / 'compile'
+    cache_dir.mkdir(exist_ok=True, parents=True)
+    return cache_dir
+
+
+def _compile_cache_key(srcdir: pathlib.Path, fmt: str, dpi: float,
+                       font_paths: tuple[str, ...] = ()) -> str:
+    """Hash all compilation inputs (markup and sidecar images) together with
+    the requested output format, resolution and font directories.
+    """
+    digest = blake2b(digest_size=20)
+    for path in sorted(srcdir.iterdir()):
+        digest.update(path.name.encode('utf-8'))
+        digest.update(path.read_bytes())
+    digest.update(f'{fmt}:{dpi}:{":".join(font_paths)}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _compile_cache_get(key: str, fmt: str,
+                       out_path: pathlib.Path) -> bool:
+    entry = _compile_cache_dir() / f'{key}.{fmt}'
+    try:
+        copyfile(entry, out_path)
+    except OSError:
+        return False
+    entry.touch()  # Track recency for eviction.
+    return True
+
+
+def _compile_cache_put(key: str, fmt: str, out_path: pathlib.Path):
+    cache_dir = _compile_cache_dir()
+    entry = cache_dir / f'{key}.{fmt}'
+    entry_tmp = entry.with_suffix(entry.suffix + '.tmp')
+    try:
+        copyfile(out_path, entry_tmp)
+        entry_tmp.replace(entry)
+    except OSError:
+        return
+
+    # Evict the least recently used entries over the cache size limit.
+    entries = sorted(cache_dir.iterdir(), key=lambda el: el.stat().st_mtime)
+    for stale in entries[:-COMPILE_CACHE_LIMIT]:
+        stale.unlink(missing_ok=True)
+
+
+# Parse compiler diagnostics on raw bytes: only the captured groups are
+# decoded, so error-heavy runs do not materialize a second copy of stderr
+# just for matching.
 RE_ERROR = re.compile(
-    r'^(?P<filename>.*):(?P<line>\d+):(?P<column>\d+): error: (?P<reason>.*)$')
+    rb'^(?P<filename>.*):(?P<line>\d+):(?P<column>\d+): error: '
+    rb'(?P<reason>.*)$',
+    re.MULTILINE)
 
 TPL_ERROR = '  {filename}:{line}:{column}: {reason}'
 
 
+@cache
+def _get_typst_bindings():
+    """Import the optional `typst` Python bindings (typst-py).
+
+    The bindings embed the compiler, so rendering does not pay the process
+    spawn and font enumeration costs of a fresh `typst compile` run per
+    figure. They are optional: `None` means fall back to the CLI.
+    """
+    try:
+        import typst
+    except ImportError:
+        return None
+    return typst
+
+
+@lru_cache(maxsize=1024)
+def _rgb(*components: float) -> Raw:
+    """Memoized color literal: colors repeat heavily across draw operations
+    (one per line artist, at most 256 per colormap), so identical component
+    tuples share a single preformatted node. Stringifying up front skips a
+    `Call` and four `Scalar` boxes per fill or stroke during serialization.
+    """
+    percents = ', '.join(f'{c * 100}%' for c in components)
+    return Raw(f'rgb({percents})')
+
+
 class TypstRenderingError(RuntimeError):
     """Represent an error occured in rendering target with Typst binary."""
 
@@ -75,6 +193,45 @@ class TypstRenderingError(RuntimeError):
                 'errors': self.errors}
 
 
+def _compile_typ(tmpdir: str, inp_path: pathlib.Path, out_path: pathlib.Path,
+                 fmt: str, dpi: float, font_paths: tuple[str, ...] = ()):
+    """Compile Typst markup to the requested format.
+
+    Prefers the in-process compiler from the `typst` bindings when they are
+    installed and spawns the `typst` binary otherwise.
+    """
+    if (bindings := _get_typst_bindings()) is not None:
+        opts = {}
+        if font_paths:
+            opts['font_paths'] = [str(path) for path in font_paths]
+        try:
+            bindings.compile(str(inp_path), output=str(out_path),
+                             root=tmpdir, format=fmt, ppi=float(dpi), **opts)
+        except RuntimeError as e:
+            # The bindings report only the reason of the first error without
+            # source location.
+            error = {'filename': str(inp_path), 'line': 0, 'column': 0,
+                     'reason': str(e)}
+            raise TypstRenderingError('', str(e), [error]) from e
+        return
+
+    cmd = [
+        str(C.compiler), 'compile', f'--root={tmpdir}', f'--format={fmt}',
+        '--diagnostic-format=short', f'--ppi={dpi}',
+        *(f'--font-path={path}' for path in font_paths), str(inp_path),
+        str(out_path)
+    ]
+    proc = subprocess.run(cmd, capture_output=True, cwd=tmpdir)
+    if proc.returncode:
+        errors = [{'filename': m['filename'].decode('utf-8'),
+                   'line': int(m['line']),
+                   'column': int(m['column']),
+                   'reason': m['reason'].decode('utf-8')}
+                  for m in RE_ERROR.finditer(proc.stderr)]
+        raise TypstRenderingError(proc.stdout.decode('utf-8'),
+                                  proc.stderr.decode('utf-8'), errors)
+
+
 class TypstRenderer(RendererBase):
     """Typst renderer handles drawing/rendering operations."""
 
@@ -100,8 +257,21 @@ class TypstRenderer(RendererBase):
 
         self._image_counter = itertools.count()
 
+        # Tick and axis labels repeat the same text style many times per
+        # figure: cache the preformatted `draw-text` template per style and
+        # only bind text and position per call (see `draw_text`).
+        self._text_templates: dict[tuple, str] = {}
+
+        # Line plots, ticks, and grid lines draw thousands of paths with a
+        # handful of distinct stroke styles: cache the assembled `stroke`
+        # node per style instead of rebuilding it for every path (see
+        # `_stroke`).
+        self._stroke_cache: dict[tuple, Raw] = {}
+
+        # Text measurement results (see `get_text_width_height_descent`).
+        self._text_size_cache: dict[tuple, tuple[float, float, float]] = {}
+
         self.writer: Optional[TypstWriter] = None
-        self.main: Optional[Block] = None
 
     def _wrap_clip(self, gc: GraphicsContextBase, expr: Call) -> Call:
         bbox = gc.get_clip_rectangle()
@@ -124,7 +294,8 @@ class TypstRenderer(RendererBase):
                 clip: bool = True):
         if clip:
             expr = self._wrap_clip(gc, expr)
-        self.main.append(expr)
+        expr.to_string(self.writer)
+        self.writer.writeln()
 
     def _rect_inside_clip(self, gc: GraphicsContextBase, x: float, y: float,
                           width: float, height: float) -> bool:
@@ -150,8 +321,42 @@ class TypstRenderer(RendererBase):
             y + height <= clip_y + clip_height + eps
         )
 
-    def _color(self, colour: ColorType) -> Call:
-        return Call('rgb', *[Scalar(c * 100, '%') for c in colour])
+    def _color(self, colour: ColorType) -> Raw:
+        return _rgb(*map(float, colour))
+
+    def _stroke(self, gc: GraphicsContextBase) -> Raw:
+        """Build (or fetch a cached) `stroke` literal for a graphics context.
+
+        Strokes are preformatted once per distinct style and reused verbatim:
+        writing one raw literal per path is cheaper than walking a node
+        subtree for every artist drawn with the same style.
+        """
+        offset, bounds = gc.get_dashes()
+        key = (gc.get_rgb(), gc.get_linewidth(), gc.get_capstyle(),
+               gc.get_joinstyle(), offset, tuple(bounds) if bounds else None)
+        if (stroke := self._stroke_cache.get(key)) is not None:
+            return stroke
+
+        # Configure basic appearance of a line.
+        if (capstyle := gc.get_capstyle()) == 'projecting':
+            capstyle = 'square'
+        paint = self._color(gc.get_rgb()).markup
+        parts = [f'paint: {paint}',
+                 f'thickness: {gc.get_linewidth()}pt',
+                 f'cap: "{capstyle}"',
+                 f'join: "{gc.get_joinstyle()}"']
+
+        # Configure appearance of dashed line.
+        if bounds:
+            array = ', '.join(f'{bound}pt' for bound in bounds)
+            if offset:
+                parts.append(f'dash: (array: ({array}), phase: {offset}pt)')
+            else:
+                parts.append(f'dash: ({array})')
+
+        stroke = Raw(f'stroke({", ".join(parts)})')
+        self._stroke_cache[key] = stroke
+        return stroke
 
     def _hatch_stroke(self, paint: Call, gc: GraphicsContextBase) -> Call:
         thickness = Scalar(gc.get_hatch_linewidth(), 'pt')
@@ -159,44 +364,43 @@ class TypstRenderer(RendererBase):
                     cap=Scalar('butt'), join=Scalar('miter'))
 
     def _hatch_point(self, tile_x: float, tile_y: float,
-                     point: tuple[float, float]) -> Array:
+                     point: tuple[float, float]) -> str:
         x, y = point
-        return Array([Scalar(tile_x + x, 'in'), Scalar(tile_y + 1 - y, 'in')])
+        return f'({tile_x + x:.6f}in, {tile_y + 1 - y:.6f}in)'
 
     def _hatch_curves(self, path: Path, tile_x: float, tile_y: float,
                       paint: Call, stroke: Call) -> list[Call]:
-        subpath: list[Call] | None = None
-        superpath: list[list[Call]] = []
+        subpath: list[Raw] | None = None
+        superpath: list[list[Raw]] = []
 
         for points, code in path.iter_segments():
             coords = list(zip(points[0::2], points[1::2]))
-            scalars = [self._hatch_point(tile_x, tile_y, point)
-                       for point in coords]
+            pts = ', '.join(self._hatch_point(tile_x, tile_y, point)
+                            for point in coords)
             match code:
                 case Path.STOP:
                     continue
                 case Path.MOVETO:
                     subpath = []
                     superpath.append(subpath)
-                    op = Call('curve.move', scalars[0])
+                    op = Raw(f'curve.move({pts})')
                 case Path.LINETO:
-                    op = Call('curve.line', scalars[0])
+                    op = Raw(f'curve.line({pts})')
                 case Path.CURVE3:
-                    op = Call('curve.quad', scalars[0], scalars[1])
+                    op = Raw(f'curve.quad({pts})')
                 case Path.CURVE4:
-                    op = Call('curve.cubic', scalars[0], scalars[1],
-                              scalars[2])
+                    op = Raw(f'curve.cubic({pts})')
                 case Path.CLOSEPOLY:
-                    op = Call('curve.close', mode='"straight"')
+                    op = CURVE_CLOSE
 
             if subpath is not None:
                 subpath.append(op)
 
         curves = []
-        zero = Scalar(0, 'in')
         for subpath in superpath:
             curve = Call('curve', *subpath, fill=paint, stroke=stroke)
-            curve_abs = Call('place', 'top + left', curve, dx=zero, dy=zero)
+            curve_abs = Call('place', 'top + left', curve, dx=ZERO_IN,
+                             dy=ZERO_IN)
             curves.append(curve_abs)
         return curves
 
@@ -252,25 +456,26 @@ class TypstRenderer(RendererBase):
         return x0, y0, x1 - x0, y1 - y0
 
     def __enter__(self) -> Self:
-        # First of all, add some helpers for rendering at the beginning.
-        with open(PROLOGUE) as fin:
-            template = fin.read()
-            text = template.replace('{{ date }}', self.timestamp.isoformat())
-            text = text.replace('{{ preamble }}', self.config.preamble)
-        self.fout.write(text)
-        self.fout.write('\n')
+        # First of all, add some helpers for rendering at the beginning. The
+        # `based` package is only needed to decode base64-inlined raster
+        # images, so skip the import (and the package resolution it triggers)
+        # when images are written as sidecar files.
+        imports = ''
+        if not self.config.detached_images:
+            imports = '#import "@preview/based:0.1.0": base64'
+        head, mid1, mid2, tail = _read_prologue()
+        self.fout.write(f'{head}{self.timestamp.isoformat()}{mid1}{imports}'
+                        f'{mid2}{self.config.preamble}{tail}\n')
 
         # Now configure document geometry and set metadata.
         if self.metadata:
             title = 'none'
             if value := self.metadata.get('title'):
-                escaped = value.replace('"', '"')
-                title = f'"{escaped}"'
+                title = f'"{value.translate(ESCAPE_STRING)}"'
 
             author = '()'
             if value := self.metadata.get('author'):
-                escaped = value.replace('"', '"')
-                author = f'"{value}"'
+                author = f'"{value.translate(ESCAPE_STRING)}"'
 
             date_ = 'auto'
             if ts := self.metadata.get('date', self.timestamp.date()):
@@ -291,18 +496,27 @@ class TypstRenderer(RendererBase):
                             f'height: {self.height}in, margin: 0pt)\n')
             self.fout.write('\n')
 
-        # Create a main block for drawing.
-        self.main = Block()
+        # Open the main drawing block and stream markup into it: draw calls
+        # serialize immediately instead of accumulating the whole figure as
+        # an in-memory tree, keeping peak memory flat for huge figures.
+        self.fout.write('#block(\n'
+                        '  spacing: 0pt,\n'
+                        '  above: 0pt,\n'
+                        '  below: 0pt,\n'
+                        f'  width: {self.width}in,\n'
+                        f'  height: {self.height}in,\n'
+                        '  {\n')
+        self.writer = TypstWriter(self.fout, indent=2)
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.fout.write('#')  # Escape command.
-        self.writer = TypstWriter(self.fout)
-        expr = Call('block', self.main, spacing=Scalar(0, 'pt'),
-                    above=Scalar(0, 'pt'), below=Scalar(0, 'pt'),
-                    width=Scalar(self.width, 'in'),
-                    height=Scalar(self.height, 'in'))
-        expr.to_string(self.writer)
+        # With bbox_inches='tight' matplotlib runs an extra probing render
+        # which it aborts mid-draw with an internal exception just to get
+        # hold of a renderer. The partially streamed markup is discarded by
+        # the caller, so do not bother closing the drawing block.
+        if exc_type is not None:
+            return
+        self.fout.write('  })')
 
     def get_image_magnification(self) -> float:
         return 1
@@ -322,17 +536,26 @@ class TypstRenderer(RendererBase):
             h = h / self.image_dpi
 
         # TODO(@daskol): Do not flip ourselves. Let Typst flip it for us!
-        img = ImageOps.flip(Image.fromarray(im))
+        # Matplotlib hands over contiguous uint8 RGBA rasters: wrap the
+        # buffer directly and let Pillow read it bottom-up (`-1` orientation)
+        # so neither the flip nor `fromarray` copies the image.
+        im = np.asarray(im)
+        if (im.dtype == np.uint8 and im.ndim == 3 and im.shape[2] == 4
+                and im.flags['C_CONTIGUOUS']):
+            img = Image.frombuffer('RGBA', (im.shape[1], im.shape[0]), im,
+                                   'raw', 'RGBA', 0, -1)
+        else:
+            img = Image.fromarray(np.ascontiguousarray(im[::-1]))
 
         if self.config.detached_images:
-            if self.basename is None:
+            if self.path is None:
                 raise ValueError(
                     'Cannot save raster image files to filesystem since '
                     'target directory is not specified.')
             image_ext = f'.image{next(self._image_counter)}.png'
             image_path = self.path.with_suffix(image_ext)
             img.save(image_path)
-            image = Call('image.decode', f'"{image_path.name}"',
+            image = Call('image', f'"{image_path.name}"',
                          width=Scalar(w, 'in'), height=Scalar(h, 'in'))
         else:
             buf = BytesIO()
@@ -350,51 +573,29 @@ class TypstRenderer(RendererBase):
         place = Call('place', 'top + left', image,
                      dx=Scalar(x / self.dpi, 'in'),
                      dy=Scalar(self.height - y / self.dpi - h, 'in'))
-        self.main.append(place)
+        self._append(gc, place, clip=False)
 
     def draw_path(self, gc: GraphicsContextBase, path: Path,
                   transform: Transform, rgbFace: ColorType | None = None):
-        # Transform y-coordinates since Oy axis is flipped.
-        def normalize(coords) -> tuple[float, ...]:
-            result = []
-            for ix, coord in enumerate(coords):
-                if (ix % 2) == 1:
-                    coord = self.height - coord / self.dpi
-                else:
-                    coord = coord / self.dpi
-                result.append(coord)
-            return tuple(result)
+        # Matplotlib hands over plenty of dead work: empty paths from hidden
+        # artists and paths whose every paint (fill, stroke, hatch) is fully
+        # transparent. Skip them before any markup is produced.
+        if not len(path.vertices):
+            return
+        rgb = gc.get_rgb()
+        invisible_stroke = (gc.get_linewidth() <= 0
+                            or (len(rgb) > 3 and rgb[3] == 0))
+        invisible_fill = (rgbFace is None
+                          or (len(rgbFace) > 3 and rgbFace[3] == 0))
+        if invisible_stroke and invisible_fill and gc.get_hatch() is None:
+            return
 
         # Configure how to fill the path.
         fill = None
         if rgbFace is not None:
             fill = self._color(rgbFace)
 
-        # Configure basic appearance of a line.
-        if (capstyle := gc.get_capstyle()) == 'projecting':
-            capstyle = 'square'
-        colour = self._color(gc.get_rgb())
-        stroke = Call(
-            'stroke',
-            paint=colour,
-            thickness=Scalar(gc.get_linewidth(), 'pt'),
-            cap=Scalar(capstyle),
-            join=Scalar(gc.get_joinstyle()),
-        )
-
-        # Configure appearance of dashed line.
-        (offset, bounds) = gc.get_dashes()
-        if bounds:
-            bounds = Array([Scalar(bound, 'pt') for bound in bounds])
-            if offset:
-                stroke.kwargs.update({
-                    'dash': Dictionary({
-                        'array': bounds,
-                        'phase': Scalar(offset, 'pt'),
-                    })
-                })
-            else:
-                stroke.kwargs.update({'dash': bounds})
+        stroke = self._stroke(gc)
 
         rect = self._path_rect(path, transform)
         if gc.get_hatch() and rect:
@@ -431,90 +632,154 @@ class TypstRenderer(RendererBase):
                 self._append(gc, place, clip=False)
                 return
 
+        if not len(path):
+            return
+
+        # Apply the transform to the whole path at once (instead of letting
+        # `iter_segments` hand segments over one by one) and normalize every
+        # coordinate in two vectorized passes: divide by DPI and flip the Oy
+        # axis.
+        cleaned = path.cleaned(transform=transform, remove_nans=True,
+                               simplify=None, curves=True)
+        vertices = cleaned.vertices / self.dpi
+        vertices[:, 1] = self.height - vertices[:, 1]
+        codes = cleaned.codes
+
         # Since Typst v0.13.0, path drawing API (aka curve) is more coherent to
         # Matplotlib's Path object.
-        subpath: list[Call]
-        superpath: list[list[Call]] = []
-        for points, code in path.iter_segments(transform):
-            points = normalize(points)
-            scalars = tuple([Scalar(p, 'in') for p in points])
-            match code:
-                case Path.STOP:
-                    raise NotImplementedError('It was previously ignored.')
-                case Path.LINETO:
-                    op = Call('curve.line', Array(scalars))
-                case Path.MOVETO:
-                    # NOTE There is no STOP opcode in Typst thus we should
-                    # manually create subpaths.
-                    subpath = []
-                    superpath += [subpath]
-                    op = Call('curve.move', Array(scalars))
-                case Path.CURVE3:
-                    qp1, qp2 = Array(scalars[:2]), Array(scalars[2:])
-                    op = Call('curve.quad', qp1, qp2)
-                case Path.CURVE4:
-                    cp1 = Array(scalars[:2])
-                    cp2 = Array(scalars[2:4])
-                    cp3 = Array(scalars[4:6])
-                    op = Call('curve.cubic', cp1, cp2, cp3)
-                case Path.CLOSEPOLY:
-                    op = Call('curve.close', mode='"straight"')
+        #
+        # Dispatch on hoisted locals ordered by frequency: a `match` over
+        # dotted names re-reads the `Path` attributes for every segment.
+        num_vertices_for_code = Path.NUM_VERTICES_FOR_CODE
+        stop, moveto, lineto = Path.STOP, Path.MOVETO, Path.LINETO
+        curve3, curve4, closepoly = Path.CURVE3, Path.CURVE4, Path.CLOSEPOLY
+        subpath: list[Raw]
+        superpath: list[list[Raw]] = []
+        num_codes = len(codes)
+
+        # Fast path for polylines (one MOVETO, then LINETOs, then STOP):
+        # line plots spend most of their segments here, and a comprehension
+        # over the vertices skips the per-segment bookkeeping of the generic
+        # loop below.
+        if (num_codes > 2 and codes[0] == moveto and codes[-1] == stop
+                and (codes[1:-1] == lineto).all()):
+            points = [f'({x:.6f}in, {y:.6f}in)'
+                      for x, y in vertices[:-1]]
+            subpath = [Raw(f'curve.move({points[0]})')]
+            subpath += [Raw(f'curve.line({pt})') for pt in points[1:]]
+            superpath += [subpath]
+            num_codes = 0  # Nothing left for the generic loop.
+
+        ix = 0
+        while ix < num_codes:
+            code = codes[ix]
+            num_vertices = num_vertices_for_code[code]
+            points = vertices[ix:ix + num_vertices]
+            ix += num_vertices
+            # Preformat the whole operation as one raw literal: a single
+            # node per segment instead of a `Call`/`Scalar` subtree on the
+            # hottest loop of the renderer.
+            pts = ', '.join(f'({x:.6f}in, {y:.6f}in)'
+                            for x, y in points)
+            if code == lineto:
+                op = Raw(f'curve.line({pts})')
+            elif code == moveto:
+                # NOTE There is no STOP opcode in Typst thus we should
+                # manually create subpaths.
+                subpath = []
+                superpath += [subpath]
+                op = Raw(f'curve.move({pts})')
+            elif code == curve4:
+                op = Raw(f'curve.cubic({pts})')
+            elif code == curve3:
+                op = Raw(f'curve.quad({pts})')
+            elif code == closepoly:
+                op = CURVE_CLOSE
+            elif code == stop:
+                break
             subpath += [op]
 
+        # A stroke-only path renders identically whether its subpaths live in
+        # one `curve` or many, so batch them into a single call (and a single
+        # `place`): a dashed line plot with hundreds of segments collapses
+        # from hundreds of markup elements to one. Filled paths keep one
+        # `curve` per subpath: merging would change how overlapping subpaths
+        # are filled.
+        if fill is None:
+            superpath = [[op for subpath in superpath for op in subpath]]
+
         for subpath in superpath:
             line = Call('curve', *subpath, fill=fill, stroke=stroke)
             place = Call('place', 'top + left', line,
-                         dx=Scalar(0, 'in'), dy=Scalar(0, 'in'))
+                         dx=ZERO_IN, dy=ZERO_IN)
             self._append(gc, place)
 
     def draw_quad_mesh(self, gc, master_transform, meshWidth, meshHeight,
                        coordinates, offsets, offsetTrans, facecolors,
                        antialiased, edgecolors):
         # TODO(@daskol): Apply offset transformation.
-        vertices = np.array([master_transform.transform(point)
-                             for point in coordinates])
+        coordinates = np.asarray(coordinates)
+        vertices = master_transform \
+            .transform(coordinates.reshape(-1, 2)) \
+            .reshape(coordinates.shape)
         vertices /= self.dpi  # Points to inches.
         vertices[..., 1] = self.height - vertices[..., 1]  # Inverted Oy axis.
 
-        # Cast coordinates to term in internal representation.
-        shape = vertices.shape
-        vertices = np.array([Scalar(el, 'in') for el in vertices.flatten()])
-        vertices = vertices.reshape(shape)
-
+        # Group quads by appearance: colormap-driven meshes repeat face and
+        # edge colors a lot, so batching same-styled quads into a single
+        # `curve` with one closed subpath per quad keeps the number of markup
+        # elements (and Typst layout work) proportional to the number of
+        # distinct styles, not the number of cells.
+        lw = gc.get_linewidth()
+        buckets: dict[tuple, list[Raw]] = {}
         for i in range(vertices.shape[0] - 1):
             # TODO(@daskol): What about shapes coordinates, facecolors, and
             # edgecolors?
-            facecolor = [Scalar(c * 100, '%') for c in facecolors[i]]
+            facecolor = tuple(facecolors[i])
+            if edgecolors:
+                edgecolor = tuple(edgecolors[i])
+            else:
+                edgecolor = facecolor
+            ops = buckets.setdefault((facecolor, edgecolor), [])
+            if lw <= 0 or edgecolor == facecolor:
+                # Cells in a row share their vertical edges and (per the
+                # row-wise styling above) their appearance, so as long as no
+                # contrasting border is drawn the whole row collapses into
+                # one closed outline: bottom edge left to right, then top
+                # edge back. One markup element per row instead of per cell,
+                # and no antialiasing seams between abutting fills.
+                outline = itertools.chain(vertices[i + 1], vertices[i][::-1])
+                points = [f'({x:.6f}in, {y:.6f}in)'
+                          for x, y in outline]
+                ops.append(Raw(f'curve.move({points[0]})'))
+                ops.extend(Raw(f'curve.line({pt})') for pt in points[1:])
+                ops.append(CURVE_CLOSE)
+                continue
             for j in range(vertices.shape[1] - 1):
-                # Create filling color.
-                fill = Call('rgb', *facecolor)
-
-                # Create stroke if line width is given.
-                if edgecolors:
-                    edgecolor = [Scalar(c * 100, '%') for c in edgecolors[i]]
-                else:
-                    edgecolor = facecolor
-                stroke = None
-                if (lw := gc.get_linewidth()) > 0:
-                    paint = Call('rgb', *edgecolor)
-                    stroke = Call('stroke', paint=paint,
-                                  thickness=Scalar(lw, 'pt'))
-
-                # TODO(@daskol): Take into account joints, dashes, and hatches.
-
                 # Select quad and walk over it anti-clockwise.
                 quad = vertices[i:i + 2, j:j + 2]
                 quad = quad.reshape(4, 2)
                 quad = quad[[2, 3, 1, 0]]
-                line = Call('path', fill=fill, stroke=stroke, closed=True)
-                for coords in quad:
-                    point = Array(coords)
-                    line.args.append(point)
-
-                # Put on canvas with respect of the origin.
-                place = Call('place', 'top + left', line,
-                             dx=Scalar(0, 'in'), dy=Scalar(0, 'in'))
-                self._append(gc, place)
+                p0, p1, p2, p3 = (f'({x:.6f}in, {y:.6f}in)'
+                                  for x, y in quad)
+                ops.append(Raw(f'curve.move({p0})'))
+                ops.append(Raw(f'curve.line({p1})'))
+                ops.append(Raw(f'curve.line({p2})'))
+                ops.append(Raw(f'curve.line({p3})'))
+                ops.append(CURVE_CLOSE)
+
+        # TODO(@daskol): Take into account joints, dashes, and hatches.
+        for (facecolor, edgecolor), ops in buckets.items():
+            fill = _rgb(*map(float, facecolor))
+            stroke = None
+            if lw > 0:
+                paint = _rgb(*map(float, edgecolor))
+                stroke = Call('stroke', paint=paint,
+                              thickness=Scalar(lw, 'pt'))
+            curve = Call('curve', *ops, fill=fill, stroke=stroke)
+            place = Call('place', 'top + left', curve,
+                         dx=ZERO_IN, dy=ZERO_IN)
+            self._append(gc, place)
 
     def draw_text(self, gc: GraphicsContextBase, x: float, y: float, s: str,
                   prop: FontProperties, angle: float,
@@ -526,13 +791,15 @@ class TypstRenderer(RendererBase):
 
         rgb = gc.get_rgb()
         hex_color = mpl.colors.to_hex(rgb, keep_alpha=len(rgb) == 4)
-        text_color = Call('rgb', Scalar(hex_color))
 
         if mtext:
+            # NOTE The passed-in (x, y) is the already-aligned glyph origin;
+            # since alignment is delegated to Typst, we anchor at the text
+            # position itself and must recompute it from the artist.
             pos = mtext.get_unitless_position()
             x, y = mtext.get_transform().transform(pos)
-            x = x / self.figure.dpi
-            y = self.height - y / self.figure.dpi
+            x = x / self.dpi
+            y = self.height - y / self.dpi
             halign = mtext.get_horizontalalignment()
             valign = mtext.get_verticalalignment()
             match valign:
@@ -548,19 +815,17 @@ class TypstRenderer(RendererBase):
             fontsize = mtext.get_fontsize()
             angle = mtext.get_rotation()
         else:
-            x = x / self.figure.dpi
-            y = self.height + y / self.figure.dpi
-
-        elem = Call('draw-text',
-                    Content(s),
-                    dx=Scalar(x, 'in'),
-                    dy=Scalar(y, 'in'),
-                    size=Scalar(fontsize, 'pt'),
-                    alignment=alignment,
-                    baseline=baseline,
-                    angle=Scalar(360 - angle, 'deg'),
-                    fill=text_color)
-        self.main.append(elem)
+            x = x / self.dpi
+            y = self.height + y / self.dpi
+
+        style = (fontsize, alignment, baseline, angle, hex_color)
+        if (template := self._text_templates.get(style)) is None:
+            template = ('draw-text({}, dx: {:.6f}in, dy: {:.6f}in, '
+                        f'size: {fontsize}pt, alignment: {alignment}, '
+                        f'baseline: {str(baseline).lower()}, '
+                        f'angle: {360 - angle}deg, fill: rgb("{hex_color}"))')
+            self._text_templates[style] = template
+        self.writer.writeln(template.format(f'[{s}]', x, y))
 
     def flipy(self):
         """Axis Oy points to bottom."""
@@ -573,7 +838,15 @@ class TypstRenderer(RendererBase):
             self, s: str, prop: FontProperties,
             ismath: bool | Literal['TeX'] = False,
     ) -> tuple[float, float, float]:
-        return super().get_text_width_height_descent(s, prop, ismath)
+        # Matplotlib measures the same tick and axis labels repeatedly
+        # during layout, and the base implementation parses mathtext on
+        # every call. Memoize per text and font pattern (the pattern covers
+        # family, style, weight, and size).
+        key = (s, prop.get_fontconfig_pattern(), ismath)
+        if (size := self._text_size_cache.get(key)) is None:
+            size = super().get_text_width_height_descent(s, prop, ismath)
+            self._text_size_cache[key] = size
+        return size
 
     def new_gc(self) -> Type[GraphicsContextBase]:
         return TypstGraphicsContext()
@@ -608,6 +881,14 @@ class TypstFigureCanvas(FigureCanvasBase):
 
     manager_class = TypstFigureManager
 
+    # Markup emitted by the last `_print_typ` call together with its render
+    # key and sidecar image files: `(key, markup, images)`. Reused while the
+    # figure is not stale, so saving one figure to several formats traverses
+    # the artist tree only once.
+    _typ_cache: tuple[tuple, str, dict[str, bytes]] | None = None
+
+    _typ_cacheable: bool = True
+
     def draw(self):
         """Draw the figure using the renderer."""
         self.figure.draw_without_rendering()
@@ -616,6 +897,44 @@ class TypstFigureCanvas(FigureCanvasBase):
     def get_default_filetype(self):
         return 'typ'
 
+    def print_figure(self, filename, dpi=None, facecolor=None, edgecolor=None,
+                     *args, **kwargs):
+        # The base `print_figure` saves and restores figure-wide attributes
+        # (layout engine, DPI) around every render, and each restore marks
+        # the figure stale even though it is net-unchanged. Snapshot the
+        # verdict on entry and clear the flag after a successful save so the
+        # markup cache survives back-to-back saves of an unchanged figure.
+        if self.figure.stale:
+            self._typ_cache = None
+
+        # Some render modes are invisible to the markup cache key: explicit
+        # face or edge colors temporarily mutate the figure, while tight
+        # bounding boxes and layout engines make the base `print_figure`
+        # probe for a renderer with `Figure.draw` patched out — replaying
+        # cached markup would skip the probe and matplotlib would raise.
+        # Bypass the cache for them.
+        if (facecolor_ := facecolor) is None:
+            facecolor_ = mpl.rcParams['savefig.facecolor']
+        if (edgecolor_ := edgecolor) is None:
+            edgecolor_ = mpl.rcParams['savefig.edgecolor']
+        if (bbox_inches := kwargs.get('bbox_inches')) is None:
+            bbox_inches = mpl.rcParams['savefig.bbox']
+        plain = (bbox_inches is None
+                 and self.figure.get_layout_engine() is None
+                 and isinstance(facecolor_, str) and facecolor_ == 'auto'
+                 and isinstance(edgecolor_, str) and edgecolor_ == 'auto')
+        if not plain:
+            self._typ_cache = None
+            self._typ_cacheable = False
+        try:
+            result = super().print_figure(filename, dpi, facecolor, edgecolor,
+                                          *args, **kwargs)
+        finally:
+            self._typ_cacheable = True
+        if plain:
+            self.figure.stale = False
+        return result
+
     def print_pdf(self, filename, **kwargs):
         return self._print_as('pdf', filename, **kwargs)
 
@@ -634,24 +953,125 @@ class TypstFigureCanvas(FigureCanvasBase):
         # figure multiple types with rendering to temporary buffer (BytesIO)
         # rather than directly to file. So, we make rendering file-agnostic,
         # meaning that filename is an optional.
+        #
+        # Rendering accumulates in memory and is flushed with a single write:
+        # the renderer produces a lot of tiny writes which would otherwise
+        # each go through the full io stack (and, for files, syscalls).
+        buf = StringIO()
         if isinstance(filename, BytesIO):
-            writer = getwriter('utf-8')(filename)
-            self._print_typ(writer, config, **kwargs)
+            self._print_typ(buf, config, **kwargs)
+            filename.write(buf.getvalue().encode('utf-8'))
         else:
+            self._print_typ(buf, config, pathlib.Path(filename), **kwargs)
             with open(filename, 'w') as fout:
-                self._print_typ(fout, config, pathlib.Path(filename), **kwargs)
+                fout.write(buf.getvalue())
 
     def _print_typ(self, buf: IO[str], config: Config,
                    path: pathlib.Path | None = None, /, metadata=None,
                    bbox_inches_restore=None, **kwargs):
         width, height = self.figure.get_size_inches()
         dpi = self.figure.dpi  # NOTE Do not enforce DPI!
+
+        # Markup is deterministic for a given figure state and render
+        # parameters, so replay the last emission instead of walking the
+        # artist tree again: `savefig` to several formats (or repeated saves
+        # of an unchanged figure) renders only once. Tight bounding boxes and
+        # explicit face or edge colors bypass the cache entirely (see
+        # `print_figure`).
+        key = (config, metadata, path is not None, (width, height), dpi)
+        cacheable = self._typ_cacheable and bbox_inches_restore is None
+        if (cacheable and self._typ_cache is not None
+                and self._typ_cache[0] == key):
+            _, markup, images = self._typ_cache
+            buf.write(markup)
+            for name, blob in images.items():
+                (path.parent / name).write_bytes(blob)
+            return
+
         with TypstRenderer(self.figure, buf, config, path, metadata or {},
                            image_dpi=dpi) as tr:
             mmr = MixedModeRenderer(self.figure, width, height, dpi, tr,
                                     bbox_inches_restore=bbox_inches_restore)
             self.figure.draw(mmr)
 
+        if cacheable:
+            images = {}
+            if path is not None:
+                # Sidecar raster images written by the renderer: they belong
+                # to the emission and must be replayed along with the markup.
+                images = {el.name: el.read_bytes()
+                          for el in path.parent.glob(
+                              f'{path.stem}.image*.png')}
+            self._typ_cache = (key, buf.getvalue(), images)
+
+    def savefig_many(self, filename, formats=('pdf', 'png', 'svg', 'typ'), *,
+                     metadata=None, **kwargs):
+        """Save a figure to multiple formats at once.
+
+        The figure is rendered to Typst markup once, and all requested
+        formats are compiled from that single markup concurrently. This
+        avoids re-traversing the figure and re-compiling per format, which
+        the usual per-format :py:`savefig` loop pays in full.
+
+        .. code:: python
+
+           fig.canvas.savefig_many('line-plot', formats=('pdf', 'svg'))
+
+        The suffix of `filename` is replaced with the format name for every
+        requested format.
+        """
+        base_path = pathlib.Path(filename)
+        formats = list(dict.fromkeys(formats))
+
+        # `print_figure` is not involved here, so track markup cache validity
+        # ourselves.
+        if self.figure.stale:
+            self._typ_cache = None
+
+        metadata = metadata or {}
+        if 'author' not in metadata:
+            metadata['author'] = 'mpl_typst (Typst Matplotlib backend)'
+
+        # Typst markup itself needs no compilation: emit it directly to the
+        # target location (with inline images by default, so that the file is
+        # self-contained like a regular `savefig`).
+        if 'typ' in formats:
+            formats.remove('typ')
+            self.print_typ(base_path.with_suffix('.typ'), metadata=metadata,
+                           **dict(kwargs))
+        if not formats:
+            return
+
+        with TemporaryDirectory(prefix='typst-', dir=get_cachedir()) as tmpdir:
+            kwargs.setdefault('typst_detached_images', True)
+            font_paths = tuple(kwargs.get('typst_font_paths', ()))
+            inp_path = pathlib.Path(tmpdir) / 'main.typ'
+            self.print_typ(inp_path, metadata=metadata, **kwargs)
+
+            # Hash compile inputs for all formats up front: compiled outputs
+            # land in the same directory and must not taint the keys.
+            dpi = kwargs.get('dpi', self.figure.dpi)
+            srcdir = pathlib.Path(tmpdir)
+            keys = {fmt: _compile_cache_key(srcdir, fmt, dpi, font_paths)
+                    for fmt in formats}
+
+            _ensure_dir(base_path.parent)
+
+            def compile_one(fmt: str):
+                out_path = inp_path.with_suffix(f'.{fmt}')
+                if not _compile_cache_get(keys[fmt], fmt, out_path):
+                    _compile_typ(tmpdir, inp_path, out_path, fmt, dpi,
+                                 font_paths)
+                    _compile_cache_put(keys[fmt], fmt, out_path)
+                # Move inside the worker as well: writes to the target
+                # location (slow on network or magnetic storage) overlap with
+                # the remaining compiles instead of queueing after them.
+                move(out_path, base_path.with_suffix(f'.{fmt}'))
+
+            with ThreadPoolExecutor(max_workers=len(formats)) as pool:
+                for _ in pool.map(compile_one, formats):
+                    pass
+
     def _print_as(self, fmt, filename, *, metadata=None, **kwargs):
         # Set up default metadata. We use metadata as a condition for setting
         # canvas geometry in rendering.
@@ -660,37 +1080,34 @@ class TypstFigureCanvas(FigureCanvasBase):
             metadata['author'] = 'mpl_typst (Typst Matplotlib backend)'
 
         with TemporaryDirectory(prefix='typst-', dir=get_cachedir()) as tmpdir:
-            # Render figure in pure textual typst markup.
+            # Render figure in pure textual typst markup. Since the markup is
+            # compiled from a directory we control, raster images are written
+            # as sidecar files next to it: this avoids inflating the markup
+            # with base64 payloads (+33% in size) and spares Typst the
+            # compile-time decoding.
+            kwargs.setdefault('typst_detached_images', True)
+            font_paths = tuple(kwargs.get('typst_font_paths', ()))
             inp_path = pathlib.Path(tmpdir) / 'main.typ'
             self.print_typ(inp_path, metadata=metadata, **kwargs)
 
-            # Render typst markup running typst binary.
+            # Render typst markup running typst binary. Identical inputs
+            # produce identical artifacts, so the compile step is cached on a
+            # content hash of the compile directory: re-saving an unchanged
+            # figure degrades to a file copy.
             out_path = inp_path.with_suffix(f'.{fmt}')
             dpi = kwargs.get('dpi', self.figure.dpi)
-            cmd = [
-                str(compiler), 'compile', f'--root={tmpdir}',
-                f'--format={fmt}', '--diagnostic-format=short', f'--ppi={dpi}',
-                str(inp_path), str(out_path)
-            ]
-            proc = subprocess.run(cmd, capture_output=True, cwd=tmpdir)
-            if proc.returncode:
-                kwargs = {'stdout': proc.stdout.decode('utf-8'),
-                          'stderr': proc.stderr.decode('utf-8'),
-                          'errors': []}
-                for m in RE_ERROR.finditer(kwargs['stderr']):
-                    error = m.groupdict()
-                    error['line'] = int(error['line'])
-                    error['column'] = int(error['column'])
-                    kwargs['errors'].append(error)
-                raise TypstRenderingError(**kwargs)
+            key = _compile_cache_key(pathlib.Path(tmpdir), fmt, dpi,
+                                     font_paths)
+            if not _compile_cache_get(key, fmt, out_path):
+                _compile_typ(tmpdir, inp_path, out_path, fmt, dpi, font_paths)
+                _compile_cache_put(key, fmt, out_path)
 
             # Move rendered figure from temporary directory to target location.
             if isinstance(filename, BytesIO):
-                with open(out_path, 'rb') as fin:
-                    copyfileobj(fin, filename)
+                filename.write(out_path.read_bytes())
             else:
                 dst_path = pathlib.Path(filename)
-                dst_path.parent.mkdir(exist_ok=True, parents=True)
+                _ensure_dir(dst_path.parent)
                 move(out_path, dst_path)
 
 
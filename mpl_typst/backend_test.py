@@ -13,6 +13,8 @@ from packaging.version import Version
 from PIL import Image
 
 from mpl_typst import rc_context
+from mpl_typst.backend import (
+    _compile_cache_get, _compile_cache_key, _compile_cache_put)
 from mpl_typst.testing import assert_anchored_places
 
 data_dir = pathlib.Path(__file__).parent / 'testdata'
@@ -282,14 +284,52 @@ class TestTypstRenderer:
         assert_array_equal(actual, reference)
 
 
+class TestCompileCache:
+
+    def test_roundtrip(self, tmp_path: pathlib.Path, monkeypatch):
+        monkeypatch.setattr('mpl_typst.backend.get_cachedir',
+                            lambda: str(tmp_path / 'cache'))
+
+        srcdir = tmp_path / 'src'
+        srcdir.mkdir()
+        (srcdir / 'main.typ').write_text('#lorem(16)')
+
+        key = _compile_cache_key(srcdir, 'pdf', 144)
+        out_path = tmp_path / 'main.pdf'
+        assert not _compile_cache_get(key, 'pdf', out_path)
+
+        out_path.write_bytes(b'%PDF-stub')
+        _compile_cache_put(key, 'pdf', out_path)
+
+        restored = tmp_path / 'restored.pdf'
+        assert _compile_cache_get(key, 'pdf', restored)
+        assert restored.read_bytes() == b'%PDF-stub'
+
+        # Different inputs or rendering options must miss.
+        assert _compile_cache_key(srcdir, 'png', 144) != key
+        assert _compile_cache_key(srcdir, 'pdf', 72) != key
+        (srcdir / 'main.image0.png').write_bytes(b'\x89PNG')
+        assert _compile_cache_key(srcdir, 'pdf', 144) != key
+
+
 class TestTypstFigureCanvas:
 
-    @pytest.mark.parametrize('how', ['buffer', 'path', 'str'])
-    def test_print_typ(self, how: str, tmp_path: pathlib.Path):
+    @pytest.fixture(scope='class')
+    def sine_figure(self):
+        """Shared figure for parametrized save tests: the destination
+        varies per test while the figure (and its cached markup) does not.
+        """
         fig, ax = plt.subplots(1, 1)
         x = np.linspace(0.0, 2 * np.pi, 100)
         y = np.sin(x)
         ax.plot(x, y)
+        yield fig
+        plt.close(fig)
+
+    @pytest.mark.parametrize('how', ['buffer', 'path', 'str'])
+    def test_print_typ(self, how: str, tmp_path: pathlib.Path,
+                       sine_figure: Figure):
+        fig = sine_figure
 
         if how == 'buffer':
             buffer = BytesIO()
@@ -306,3 +346,63 @@ class TestTypstFigureCanvas:
             assert filename.stat().st_size > 0
         else:
             raise RuntimeError(f'Unexpected test parameter: how={how}.')
+
+    def test_savefig_many(self, tmp_path: pathlib.Path):
+        with rc_context():
+            fig, ax = plt.subplots(1, 1)
+            ax.plot([0.0, 1.0], [1.0, 0.0])
+            fig.canvas.savefig_many(tmp_path / 'figure.typ',
+                                    formats=('typ', 'png', 'svg'))
+            plt.close(fig)
+
+        for suffix in ('.typ', '.png', '.svg'):
+            path = tmp_path / f'figure{suffix}'
+            assert path.stat().st_size > 0, f'Missing output: {path}.'
+
+    def test_markup_cache(self, tmp_path: pathlib.Path,
+                          monkeypatch: pytest.MonkeyPatch):
+        import mpl_typst.backend
+
+        renders = []
+        init = mpl_typst.backend.TypstRenderer.__init__
+
+        def spy(self, *args, **kwargs):
+            renders.append(1)
+            init(self, *args, **kwargs)
+
+        monkeypatch.setattr(mpl_typst.backend.TypstRenderer, '__init__', spy)
+
+        with rc_context():
+            fig, ax = plt.subplots(1, 1)
+            ax.plot([0.0, 1.0], [1.0, 0.0])
+
+            # Saving an unchanged figure to several formats renders once.
+            fig.savefig(tmp_path / 'figure.png')
+            fig.savefig(tmp_path / 'figure.svg')
+            assert len(renders) == 1
+
+            # Any figure modification invalidates the cached markup.
+            ax.set_title('title')
+            fig.savefig(tmp_path / 'altered.png')
+            assert len(renders) == 2
+            plt.close(fig)
+
+        for name in ('figure.png', 'figure.svg', 'altered.png'):
+            path = tmp_path / name
+            assert path.stat().st_size > 0, f'Missing output: {path}.'
+
+    def test_markup_cache_layout_engine(self, tmp_path: pathlib.Path):
+        # A layout engine makes `print_figure` probe for a renderer with
+        # `Figure.draw` patched out; replaying cached markup would skip the
+        # draw and matplotlib would raise. Such figures must bypass the
+        # cache and still save repeatedly.
+        with rc_context():
+            fig, ax = plt.subplots(1, 1, layout='constrained')
+            ax.plot([0.0, 1.0], [1.0, 0.0])
+            fig.savefig(tmp_path / 'figure.png')
+            fig.savefig(tmp_path / 'figure.svg')
+            plt.close(fig)
+
+        for name in ('figure.png', 'figure.svg'):
+            path = tmp_path / name
+            assert path.stat().st_size > 0, f'Missing output: {path}.'
@@ -5,6 +5,7 @@ from dataclasses import dataclass, fields
 from functools import total_ordering
 from os import PathLike, getenv
 from pathlib import Path
+from shutil import which
 from tomllib import load as load_toml
 from typing import IO, Any, Self
 
@@ -121,6 +122,11 @@ class Config:
 
     detached_images: bool = False
 
+    # Extra font directories forwarded to the Typst compiler. Pointing it at
+    # the few directories that actually contain the document fonts spares the
+    # full system font scan on compiler start-up.
+    font_paths: tuple[str, ...] = ()
+
     @classmethod
     def from_dict(cls, obj: dict[str, Any], drop=False, prefix='') -> Self:
         input_keys: set[str] = set()
@@ -152,16 +158,13 @@ def get_typst_compiler(name: str, default=Path('typst')) -> Path:
         if not path.exists() or not path.is_file():
             warnings.warn(f'No typst compiler is not found at {path}.',
                           RuntimeWarning)
+    elif (found := which(str(default))) is not None:
+        path = Path(found)
     else:
-        for bin_dir in getenv('PATH', '').split(':'):
-            if (Path(bin_dir) / default).exists():
-                path = (Path(bin_dir) / default).expanduser()
-                break
-        else:
-            warnings.warn(('No Typst compiler found in `PATH` envvar. '
-                           'Consider `MPL_TYPST_COMPILER` envvar to set path '
-                           'to typst compiler explicitly.'), RuntimeWarning)
-            return default
+        warnings.warn(('No Typst compiler found in `PATH` envvar. '
+                       'Consider `MPL_TYPST_COMPILER` envvar to set path '
+                       'to typst compiler explicitly.'), RuntimeWarning)
+        return default
     return path.absolute()
 
 
@@ -186,16 +189,21 @@ def parse_typst_compiler_version(output: str) -> TypstVersion | None:
         return None
 
 
-compiler = get_typst_compiler('compiler')  # MPL_TYPST_COMPILER
+compiler: Path
 compiler_version: TypstVersion | None
 
 
 def __getattr__(name: str) -> Any:
     """Evaluate some configuration fields lazily."""
     match name:
+        case 'compiler':
+            global compiler
+            compiler = get_typst_compiler('compiler')  # MPL_TYPST_COMPILER
+            return compiler
         case 'compiler_version':
             global compiler_version
-            compiler_version = get_typst_compiler_version(compiler)
+            path = globals().get('compiler') or __getattr__('compiler')
+            compiler_version = get_typst_compiler_version(path)
             return compiler_version
         case _:
             raise AttributeError(f"'{__name__}' has no attribute '{name}'")
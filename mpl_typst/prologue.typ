@@ -5,7 +5,7 @@
  * Timestamp: {{ date }}.
  */
 
-#import "@preview/based:0.1.0": base64
+{{ imports }}
 
 {{ preamble }}
 
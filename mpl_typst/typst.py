@@ -3,22 +3,29 @@ from dataclasses import dataclass, field
 from io import StringIO
 from typing import Any, Literal, Self
 
-__all__ = ('Array', 'Block', 'Content', 'Dictionary', 'Node', 'Scalar',
+__all__ = ('Array', 'Block', 'Content', 'Dictionary', 'Node', 'Raw', 'Scalar',
            'Writer')
 
 
 class Writer:
 
+    __slots__ = ('buf', 'indent_', 'indented', 'prefix')
+
     def __init__(self, buf: StringIO | None = None, indent: int = 0):
         self.buf = buf or StringIO()
         self.indent_ = indent
         self.indented = False
+        # Indentation prefix is rebuilt only when the depth changes: `write`
+        # is the single hottest function during serialization.
+        self.prefix = 2 * indent * ' '
 
     @contextmanager
     def indent(self):
         self.indent_ += 1
+        self.prefix = 2 * self.indent_ * ' '
         yield
         self.indent_ -= 1
+        self.prefix = 2 * self.indent_ * ' '
 
     def to_string(self, value: Any) -> Self:
         match value:
@@ -35,7 +42,7 @@ class Writer:
     def write(self, content: str):
         if not self.indented:
             self.indented = True
-            self.buf.write(' ' * (2 * self.indent_))
+            self.buf.write(self.prefix)
         self.buf.write(content)
 
     def writeln(self, content: str | None = None):
@@ -47,10 +54,12 @@ class Writer:
 
 class Node:
 
+    __slots__ = ()
+
     def __str__(self) -> str:
-        buf = StringIO()
-        self.to_string(buf)
-        return buf.getvalue()
+        writer = Writer()
+        self.to_string(writer)
+        return writer.buf.getvalue()
 
     def to_string(self, writer: Writer):
         raise NotImplementedError
@@ -59,7 +68,7 @@ class Node:
 Unit = Literal['pt', 'cm', 'mm', 'in', 'em', 'px', 'deg', 'rad', '%']
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Scalar(Node):
 
     value: float | int | str
@@ -80,7 +89,22 @@ class Scalar(Node):
             writer.write(f'{self.value}')
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class Raw(Node):
+    """Preformatted Typst markup emitted verbatim.
+
+    It is a fast path for hot serialization spots: a single `Raw` replaces a
+    subtree of tiny `Array`/`Scalar` nodes when the textual form is already
+    known at construction time.
+    """
+
+    markup: str
+
+    def to_string(self, writer: Writer):
+        writer.write(self.markup)
+
+
+@dataclass(frozen=True, slots=True)
 class Content(Node):
 
     content: str
@@ -91,7 +115,7 @@ class Content(Node):
         writer.write(']')
 
 
-@dataclass
+@dataclass(slots=True)
 class Array(Node):
 
     array: list[Any] = field(default_factory=list)
@@ -113,7 +137,7 @@ class Array(Node):
             writer.write(')')
 
 
-@dataclass
+@dataclass(slots=True)
 class Dictionary(Node):
 
     dictionary: dict[str, Any] = field(default_factory=dict)
@@ -136,7 +160,7 @@ class Dictionary(Node):
         self.dictionary.update(items)
 
 
-@dataclass(init=False)
+@dataclass(init=False, slots=True)
 class Call(Node):
 
     name: str
@@ -161,7 +185,7 @@ class Call(Node):
         writer.write(')')
 
 
-@dataclass
+@dataclass(slots=True)
 class Block(Node):
 
     exprs: list[Node] = field(default_factory=list)